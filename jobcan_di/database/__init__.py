@@ -0,0 +1,10 @@
+"""
+This package provides functions to store and retrieve the responses
+of the Jobcan APIs in a SQLite database.
+
+Functions
+---------
+- `configure_connection`: Apply the recommended PRAGMAs to a connection
+- `close_connection`: Update the query planner statistics and close a connection
+"""
+from ._conn import configure_connection, close_connection
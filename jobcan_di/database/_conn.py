@@ -0,0 +1,57 @@
+"""
+This module provides helpers for the SQLite connection shared by
+the other modules in this package.
+
+Functions
+---------
+- `configure_connection`: Apply the recommended PRAGMAs to a connection
+- `close_connection`: Update the query planner statistics and close a connection
+"""
+import sqlite3
+
+
+
+def configure_connection(conn: sqlite3.Connection) -> None:
+    """Apply the recommended PRAGMAs to the connection.
+
+    Args:
+        conn: SQLite3 connection object
+
+    Note:
+        - `journal_mode=WAL` and `synchronous=NORMAL` let a commit append to the
+          write-ahead log instead of syncing the database file, so readers
+          (e.g. ODBC clients) are not blocked while data is being updated.
+        - `mmap_size` lets reads be served from the memory-mapped file
+          instead of `read()` calls.
+        - The connection should be opened once and reused for all updates,
+          rather than reopened for each record.
+        - SQLite allows only one writer at a time, even in WAL mode.
+          All the updates should go through this single connection;
+          other connections (or processes) should only read.
+        - `foreign_keys` is left disabled. Tables such as `users` and `files`
+          are updated with `INSERT OR REPLACE`, which deletes the referenced row,
+          and users may be stored before the groups and positions they refer to.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA busy_timeout=5000")
+
+
+def close_connection(conn: sqlite3.Connection) -> None:
+    """Update the query planner statistics and close the connection.
+
+    Args:
+        conn: SQLite3 connection object
+
+    Note:
+        `PRAGMA optimize` only runs `ANALYZE` on the tables that need it,
+        so it is cheap enough to be called every time the connection is closed.
+        Long-running processes should also call it periodically.
+    """
+    try:
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
@@ -0,0 +1,177 @@
+"""
+This module provides helpers for building SQL queries
+used by the other modules in this package.
+
+Functions
+---------
+- `in_clause`: Build the placeholders and parameters of an `IN (...)` clause
+- `fetch_chunks`: Fetch the result of a query in chunks of `FETCH_SIZE` rows
+- `upsert_returning_id`: Execute an upsert and return the id of the affected row
+- `insert_values`: Insert multiple rows with multi-row `INSERT ... VALUES` statements
+- `select_values`: Run a query joining multiple rows given as a `VALUES` list
+"""
+from functools import lru_cache
+from itertools import chain, islice
+import sqlite3
+from typing import Any, Iterable, Iterator, Sequence
+
+
+# number of rows fetched at once by `fetch_chunks`
+# (a power of two, so that a chunk fits in `in_clause` without padding)
+FETCH_SIZE = 512
+
+# maximum number of parameters bound to a single statement
+# (the default limit of SQLite before 3.32.0)
+MAX_PARAMS = 999
+
+# `RETURNING` is supported since SQLite 3.35.0
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+
+def in_clause(values: Sequence[Any]) -> tuple[str, list]:
+    """Build the placeholders and parameters of an `IN (...)` clause.
+
+    Args:
+        values: Values to be matched by the `IN (...)` clause
+
+    Returns:
+        Placeholders (e.g. `"?,?,?,?"`) and the parameters to bind to them.
+
+    Note:
+        The number of placeholders is rounded up to the next power of two and
+        the parameters are padded with `None`, which never matches in `IN (...)`.
+        This way only a few distinct SQL strings are generated, and the prepared
+        statements are reused from the statement cache of the connection;
+        the placeholder strings themselves are cached as well.
+        The parameters are not padded beyond `MAX_PARAMS`, so that a list
+        which fits in the limit is never rejected because of the padding.
+    """
+    params = list(values)
+    if params:
+        padded = 1 << (len(params) - 1).bit_length()
+        if padded <= MAX_PARAMS:
+            params += [None] * (padded - len(params))
+    return _placeholders(len(params)), params
+
+@lru_cache(maxsize=32)
+def _placeholders(n: int) -> str:
+    """Return `n` comma-separated placeholders (cached, as `n` is a power of two)."""
+    return ','.join(['?'] * n)
+
+def fetch_chunks(cursor: sqlite3.Cursor) -> Iterator[list]:
+    """Fetch the result of the executed query in chunks of `FETCH_SIZE` rows.
+
+    Args:
+        cursor: SQLite3 cursor object on which a query has been executed
+
+    Yields:
+        list: Rows in the chunk (at most `FETCH_SIZE` rows)
+
+    Note:
+        Only one chunk is held in memory at a time, so large tables can be
+        exported without materialising the whole result with `fetchall()`.
+    """
+    cursor.arraysize = FETCH_SIZE
+    while True:
+        rows = cursor.fetchmany()
+        if not rows:
+            break
+        yield rows
+
+def upsert_returning_id(cursor: sqlite3.Cursor,
+                        sql: str, params: Sequence[Any],
+                        select_sql: str, select_params: Sequence[Any]) -> int:
+    """Execute an upsert and return the id of the inserted or updated row.
+
+    Args:
+        cursor: SQLite3 cursor object
+        sql: `INSERT ... ON CONFLICT DO UPDATE ...` statement (without `RETURNING`)
+        params: Parameters of `sql`
+        select_sql: `SELECT id FROM ...` statement to find the row by its unique columns
+        select_params: Parameters of `select_sql`
+
+    Returns:
+        int: ID of the row
+
+    Note:
+        With SQLite 3.35.0 or later, `RETURNING id` is appended to `sql` so that
+        the id is returned by the upsert itself. `select_sql` is only executed
+        on older versions, where `lastrowid` is not reliable for the update path,
+        or when the `DO UPDATE ... WHERE` clause of `sql` skipped an unchanged row
+        (which `RETURNING` does not return).
+    """
+    if SUPPORTS_RETURNING:
+        cursor.execute(sql + " RETURNING id", params)
+        row = cursor.fetchone()
+        if row is not None:
+            return row[0]
+    else:
+        cursor.execute(sql, params)
+    cursor.execute(select_sql, select_params)
+    return cursor.fetchone()[0]
+
+def insert_values(cursor: sqlite3.Cursor,
+                  sql: str, rows: Iterable[Sequence[Any]]) -> None:
+    """Insert multiple rows with multi-row `INSERT ... VALUES` statements.
+
+    Args:
+        cursor: SQLite3 cursor object
+        sql: `INSERT` statement whose rows are written as `VALUES {values}`
+        rows: Values of the rows (all the rows must have the same length).
+              A generator can be passed; only the rows of one statement
+              are held in memory at a time.
+
+    Note:
+        The rows are split into as few statements as possible, each binding at most
+        `MAX_PARAMS` parameters. Unlike `executemany`, each statement is stepped
+        only once for all of its rows.
+    """
+    for chunk_sql, params in _values_statements(sql, rows):
+        cursor.execute(chunk_sql, params)
+
+def select_values(cursor: sqlite3.Cursor,
+                  sql: str, rows: Iterable[Sequence[Any]]) -> list:
+    """Run a query joining multiple rows given as a `VALUES` list.
+
+    Args:
+        cursor: SQLite3 cursor object
+        sql: `SELECT` statement reading the rows as `(VALUES {values}) AS v`
+             (the columns of a row are `v.column1`, `v.column2`, ...)
+        rows: Values of the rows (all the rows must have the same length)
+
+    Returns:
+        list: Rows returned by all the statements
+
+    Note:
+        Like `insert_values`, the rows are split into statements binding
+        at most `MAX_PARAMS` parameters each.
+    """
+    result = []
+    for chunk_sql, params in _values_statements(sql, rows):
+        result += cursor.execute(chunk_sql, params).fetchall()
+    return result
+
+def _values_statements(sql: str,
+                       rows: Iterable[Sequence[Any]]) -> Iterator[tuple[str, list]]:
+    """Split the rows into statements binding at most `MAX_PARAMS` parameters each.
+
+    Yields:
+        tuple: `sql` with `{values}` replaced by the placeholders of the chunk,
+               and the parameters of the chunk
+    """
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return
+    n_cols = len(first)
+    per_statement = MAX_PARAMS // n_cols
+    rows = chain([first], rows)
+    while chunk := list(islice(rows, per_statement)):
+        yield (sql.format(values=_values(len(chunk), n_cols)),
+               [v for row in chunk for v in row])
+
+@lru_cache(maxsize=128)
+def _values(n_rows: int, n_cols: int) -> str:
+    """Return the placeholders of `n_rows` rows of `n_cols` columns (cached)."""
+    return ','.join(['(' + _placeholders(n_cols) + ')'] * n_rows)
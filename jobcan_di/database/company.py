@@ -11,10 +11,20 @@ Functions
 - `update`: Update the `companies` table with the API response
 - `retrieve`: Retrieve company data from the `companies` table
 """
-import json
 import sqlite3
 from typing import Optional
 
+from ._query import in_clause
+
+
+# columns of the companies table (in the order of the API response)
+_COMPANY_COLS = (
+    'company_code', 'company_name', 'zip_code', 'address',
+    'bank_code', 'bank_name', 'branch_code', 'branch_name',
+    'bank_account_type_code', 'bank_account_code', 'bank_account_name_kana',
+    'invoice_registrated_number'
+)
+
 
 
 def create_tables(conn: sqlite3.Connection) -> None:
@@ -85,29 +95,16 @@ def retrieve(conn: sqlite3.Connection,
     """
     cursor = conn.cursor()
 
-    query = """
-    SELECT json_object(
-        'company_code', company_code,
-        'company_name', company_name,
-        'zip_code', zip_code,
-        'address', address,
-        'bank_code', bank_code,
-        'bank_name', bank_name,
-        'branch_code', branch_code,
-        'branch_name', branch_name,
-        'bank_account_type_code', bank_account_type_code,
-        'bank_account_code', bank_account_code,
-        'bank_account_name_kana', bank_account_name_kana,
-        'invoice_registrated_number', invoice_registrated_number
-    ) AS company_json
-    FROM companies
-    """
-
     if company_code is None:
-        cursor.execute(query)
+        where_clause, params = "", []
     else:
-        where_clause = f"WHERE company_code IN ({','.join(['?']*len(company_code))})"
-        cursor.execute(query + where_clause,
-                       company_code)
+        placeholders, params = in_clause(company_code)
+        where_clause = f"WHERE company_code IN ({placeholders})"
+
+    cursor.execute(f"""
+    SELECT {', '.join(_COMPANY_COLS)}
+    FROM companies
+    {where_clause}
+    """, params)
 
-    return [json.loads(row[0]) for row in cursor.fetchall()]
+    return [dict(zip(_COMPANY_COLS, row)) for row in cursor.fetchall()]
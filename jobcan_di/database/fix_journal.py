@@ -9,11 +9,53 @@ Functions
 ---------
 - `create_tables`: Create `journals` table in the database
 - `update`: Update the `journals` table with the API response
+- `update_many`: Update the `journals` table with multiple API responses at once
 - `retrieve`: Retrieve journal data from the `journals` table
+- `iter_retrieve`: Retrieve journal data from the `journals` table one journal at a time
 """
+from collections import defaultdict
 import json
 import sqlite3
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+from ._query import fetch_chunks, in_clause
+
+
+# columns of the fix_journals table (in the order of the API response)
+_FIX_JOURNAL_COLS = (
+    'journal_id', 'journal_type', 'journal_date', 'req_date', 'journal_summary',
+    'view_id', 'specifics_row_number', 'company_code', 'company_name',
+    'user_code', 'user_name', 'debit_account_title_code', 'debit_account_title_name',
+    'debit_account_sub_title_code', 'debit_account_sub_title_name',
+    'debit_tax_category_code', 'debit_tax_category_name', 'debit_amount',
+    'debit_tax_amount', 'debit_amount_without_tax', 'debit_group_code',
+    'debit_group_name', 'debit_accounting_group_code', 'debit_project_code',
+    'debit_project_name', 'credit_account_title_code', 'credit_account_title_name',
+    'credit_account_sub_title_code', 'credit_account_sub_title_name',
+    'credit_tax_category_code', 'credit_tax_category_name', 'credit_amount',
+    'credit_tax_amount', 'credit_amount_without_tax', 'credit_group_code',
+    'credit_group_name', 'credit_accounting_group_code', 'credit_project_code',
+    'credit_project_name', 'invoice_registrated_number'
+)
+
+# rows whose columns are all unchanged are not rewritten
+_INSERT_FIX_JOURNAL_SQL = f"""
+INSERT INTO fix_journals ({', '.join(_FIX_JOURNAL_COLS)})
+VALUES ({', '.join(':' + col for col in _FIX_JOURNAL_COLS)})
+ON CONFLICT (journal_id) DO UPDATE SET
+    {', '.join(f'{col} = excluded.{col}' for col in _FIX_JOURNAL_COLS[1:])}
+WHERE ({', '.join(_FIX_JOURNAL_COLS[1:])})
+    IS NOT ({', '.join('excluded.' + col for col in _FIX_JOURNAL_COLS[1:])})
+"""
+
+_INSERT_CUSTOM_JOURNAL_ITEMS_SQL = """
+INSERT OR REPLACE INTO custom_journal_items (journal_id, key, value, generic_master_record_code)
+SELECT ?,
+    json_extract(j.value, '$.key'),
+    json_extract(j.value, '$.value'),
+    json_extract(j.value, '$.generic_master_record_code')
+FROM json_each(?) AS j
+"""
 
 
 
@@ -81,6 +123,12 @@ def create_tables(conn: sqlite3.Connection) -> None:
     )
     """)
 
+    # covering index for retrieving custom_journal_item_list by journal_id
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_custom_journal_items_journal_id
+    ON custom_journal_items (journal_id, key, value, generic_master_record_code)
+    """)
+
     conn.commit()
 
 def update(conn: sqlite3.Connection,
@@ -92,45 +140,27 @@ def update(conn: sqlite3.Connection,
         data: Journal data to be inserted or updated.
               The data should be the response from the '/v1/fix_journal/' API.
     """
-    cursor = conn.cursor()
+    update_many(conn, [data])
 
-    cursor.execute("""
-    INSERT OR REPLACE INTO fix_journals (
-        journal_id, journal_type, journal_date, req_date, journal_summary,
-        view_id, specifics_row_number, company_code, company_name,
-        user_code, user_name, debit_account_title_code, debit_account_title_name,
-        debit_account_sub_title_code, debit_account_sub_title_name,
-        debit_tax_category_code, debit_tax_category_name, debit_amount,
-        debit_tax_amount, debit_amount_without_tax, debit_group_code,
-        debit_group_name, debit_accounting_group_code, debit_project_code,
-        debit_project_name, credit_account_title_code, credit_account_title_name,
-        credit_account_sub_title_code, credit_account_sub_title_name,
-        credit_tax_category_code, credit_tax_category_name, credit_amount,
-        credit_tax_amount, credit_amount_without_tax, credit_group_code,
-        credit_group_name, credit_accounting_group_code, credit_project_code,
-        credit_project_name, invoice_registrated_number
-    ) VALUES (
-        :journal_id, :journal_type, :journal_date, :req_date, :journal_summary,
-        :view_id, :specifics_row_number, :company_code, :company_name,
-        :user_code, :user_name, :debit_account_title_code, :debit_account_title_name,
-        :debit_account_sub_title_code, :debit_account_sub_title_name,
-        :debit_tax_category_code, :debit_tax_category_name, :debit_amount,
-        :debit_tax_amount, :debit_amount_without_tax, :debit_group_code,
-        :debit_group_name, :debit_accounting_group_code, :debit_project_code,
-        :debit_project_name, :credit_account_title_code, :credit_account_title_name,
-        :credit_account_sub_title_code, :credit_account_sub_title_name,
-        :credit_tax_category_code, :credit_tax_category_name, :credit_amount,
-        :credit_tax_amount, :credit_amount_without_tax, :credit_group_code,
-        :credit_group_name, :credit_accounting_group_code, :credit_project_code,
-        :credit_project_name, :invoice_registrated_number
-    )
-    """, data)
+def update_many(conn: sqlite3.Connection,
+                data_list: Iterable[dict]) -> None:
+    """Update multiple journals in the fix_journals table in a single transaction.
+
+    Args:
+        conn: SQLite3 connection object
+        data_list: Journal data to be inserted or updated.
+                   Each element should be the response from the '/v1/fix_journal/' API.
+    """
+    data_list = list(data_list)
+    # custom_journal_item_list of each journal is expanded by json_each() in SQLite
+    items = ((data['journal_id'], json.dumps(data['custom_journal_item_list']))
+             for data in data_list
+             if data['custom_journal_item_list'])
 
-    for item in data['custom_journal_item_list']:
-        cursor.execute("""
-        INSERT OR REPLACE INTO custom_journal_items (journal_id, key, value, generic_master_record_code)
-        VALUES (?, ?, ?, ?)
-        """, (data['journal_id'], item['key'], item['value'], item['generic_master_record_code']))
+    cursor = conn.cursor()
+
+    cursor.executemany(_INSERT_FIX_JOURNAL_SQL, data_list)
+    cursor.executemany(_INSERT_CUSTOM_JOURNAL_ITEMS_SQL, items)
 
     conn.commit()
 
@@ -147,68 +177,52 @@ def retrieve(conn: sqlite3.Connection,
         dict: Journal data
               None if the journal ID is not found
     """
-    cursor = conn.cursor()
+    return list(iter_retrieve(conn, journal_id))
 
-    query = """
-    SELECT json_object(
-        'journal_id', journal_id,
-        'journal_type', journal_type,
-        'journal_date', journal_date,
-        'req_date', req_date,
-        'journal_summary', journal_summary,
-        'view_id', view_id,
-        'specifics_row_number', specifics_row_number,
-        'company_code', company_code,
-        'company_name', company_name,
-        'user_code', user_code,
-        'user_name', user_name,
-        'debit_account_title_code', debit_account_title_code,
-        'debit_account_title_name', debit_account_title_name,
-        'debit_account_sub_title_code', debit_account_sub_title_code,
-        'debit_account_sub_title_name', debit_account_sub_title_name,
-        'debit_tax_category_code', debit_tax_category_code,
-        'debit_tax_category_name', debit_tax_category_name,
-        'debit_amount', debit_amount,
-        'debit_tax_amount', debit_tax_amount,
-        'debit_amount_without_tax', debit_amount_without_tax,
-        'debit_group_code', debit_group_code,
-        'debit_group_name', debit_group_name,
-        'debit_accounting_group_code', debit_accounting_group_code,
-        'debit_project_code', debit_project_code,
-        'debit_project_name', debit_project_name,
-        'credit_account_title_code', credit_account_title_code,
-        'credit_account_title_name', credit_account_title_name,
-        'credit_account_sub_title_code', credit_account_sub_title_code,
-        'credit_account_sub_title_name', credit_account_sub_title_name,
-        'credit_tax_category_code', credit_tax_category_code,
-        'credit_tax_category_name', credit_tax_category_name,
-        'credit_amount', credit_amount,
-        'credit_tax_amount', credit_tax_amount,
-        'credit_amount_without_tax', credit_amount_without_tax,
-        'credit_group_code', credit_group_code,
-        'credit_group_name', credit_group_name,
-        'credit_accounting_group_code', credit_accounting_group_code,
-        'credit_project_code', credit_project_code,
-        'credit_project_name', credit_project_name,
-        'invoice_registrated_number', invoice_registrated_number,
-        'custom_journal_item_list', (
-            SELECT json_group_array(json_object(
-                'key', key,
-                'value', value,
-                'generic_master_record_code', generic_master_record_code
-            ))
-            FROM custom_journal_items
-            WHERE journal_id = fix_journals.journal_id
-        )
-    ) AS journal_json
-    FROM fix_journals
+def iter_retrieve(conn: sqlite3.Connection,
+                  journal_id: Optional[list[int]] = None) -> Iterator[dict]:
+    """Retrieve journal data from the database one journal at a time.
+
+    Args:
+        conn: SQLite3 connection object
+        journal_id: Journal ID(s) to retrieve data for
+                    If None, all journal data is retrieved
+
+    Yields:
+        dict: Journal data
     """
+    cursor = conn.cursor()
 
     if journal_id is None:
-        cursor.execute(query)
+        where_clause, params = "", []
     else:
-        where_clause = f"WHERE journal_id IN ({','.join(['?']*len(journal_id))})"
-        cursor.execute(query + where_clause,
-                       journal_id)
+        placeholders, params = in_clause(journal_id)
+        where_clause = f"WHERE journal_id IN ({placeholders})"
 
-    return [json.loads(row[0]) for row in cursor.fetchall()]
+    cursor.execute(f"""
+    SELECT {', '.join(_FIX_JOURNAL_COLS)}
+    FROM fix_journals
+    {where_clause}
+    """, params)
+
+    for rows in fetch_chunks(cursor):
+        journals = [dict(zip(_FIX_JOURNAL_COLS, row)) for row in rows]
+
+        # custom_journal_item_list of the journals in the chunk is retrieved at once
+        items = defaultdict(list)
+        placeholders, params = in_clause([journal['journal_id'] for journal in journals])
+        for j_id, key, value, gm_code in conn.execute(f"""
+        SELECT journal_id, key, value, generic_master_record_code
+        FROM custom_journal_items
+        WHERE journal_id IN ({placeholders})
+        ORDER BY rowid
+        """, params):
+            items[j_id].append({
+                'key': key,
+                'value': value,
+                'generic_master_record_code': gm_code
+            })
+
+        for journal in journals:
+            journal['custom_journal_item_list'] = items[journal['journal_id']]
+            yield journal
@@ -9,11 +9,32 @@ Functions
 ---------
 - `create_tables`: Create `forms` table in the database
 - `update`: Insert or update `forms` data in the database
+- `update_many`: Insert or update multiple `forms` data in the database
 - `retrieve`: Retrieve `forms` data from the database
+- `iter_retrieve`: Retrieve `forms` data from the database one row at a time
 - `retrieve_form_ids`: Retrieve all form ids from the database
+- `iter_form_ids`: Retrieve all form ids from the database one id at a time
 """
 import sqlite3
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+from ._query import fetch_chunks, in_clause
+
+
+_INSERT_FORM_SQL = """
+INSERT INTO forms (id, category, form_type, settlement_type, name, view_type, description)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    category = excluded.category,
+    form_type = excluded.form_type,
+    settlement_type = excluded.settlement_type,
+    name = excluded.name,
+    view_type = excluded.view_type,
+    description = excluded.description
+WHERE (category, form_type, settlement_type, name, view_type, description)
+    IS NOT (excluded.category, excluded.form_type, excluded.settlement_type,
+            excluded.name, excluded.view_type, excluded.description)
+"""
 
 
 
@@ -50,21 +71,35 @@ def update(conn: sqlite3.Connection,
         data: Form data to be inserted or updated.
               The data should be the 'results' element of the result from the '/v1/forms/' API.
     """
+    update_many(conn, [data])
+
+
+def update_many(conn: sqlite3.Connection,
+                data_list: Iterable[dict]):
+    """Update multiple rows in the forms table in a single transaction.
+
+    Args:
+        conn: SQLite3 connection object
+        data_list: Form data to be inserted or updated.
+                   Each element should be the 'results' element of the result from the '/v1/forms/' API.
+
+    Note:
+        Callers storing all the 'results' of the API should use this function
+        instead of calling `update` for each element, which commits every row.
+    """
     cursor = conn.cursor()
 
-    cursor.execute("""
-    INSERT OR REPLACE INTO forms (id, category, form_type, settlement_type, name, view_type, description)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (
-        data["id"], data["category"], data["form_type"], data["settlement_type"],
-        data["name"], data["view_type"], data["description"]
+    cursor.executemany(_INSERT_FORM_SQL, (
+        (data["id"], data["category"], data["form_type"], data["settlement_type"],
+         data["name"], data["view_type"], data["description"])
+        for data in data_list
     ))
 
     conn.commit()
 
 
 def retrieve(conn: sqlite3.Connection,
-             form_id: Optional[list[int]] = None):
+             form_id: Optional[list[int]] = None) -> list[dict]:
     """Retrieve `forms` data from the forms table.
 
     Args:
@@ -76,34 +111,40 @@ def retrieve(conn: sqlite3.Connection,
     Returns:
         list of dict: List of form data.
     """
+    return list(iter_retrieve(conn, form_id))
+
+
+def iter_retrieve(conn: sqlite3.Connection,
+                  form_id: Optional[list[int]] = None) -> Iterator[dict]:
+    """Retrieve `forms` data from the forms table one row at a time.
+
+    Args:
+        conn: SQLite3 connection object
+        form_id: list of int
+            List of form ids to be read from the table.
+            If empty, all data will be read.
+
+    Yields:
+        dict: Form data.
+    """
     if form_id is None:
         form_id = []
 
     cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
 
+    placeholders, params = in_clause(form_id)
     where_statement = ""
     if form_id:
-        where_statement = f"WHERE id IN ({','.join(['?']*len(form_id))})"
+        where_statement = f"WHERE id IN ({placeholders})"
 
     cursor.execute(f"""
     SELECT * FROM forms
     {where_statement}
-    """, form_id)
-
-    results = []
-
-    for row in cursor.fetchall():
-        results.append({
-            "id": row[0],
-            "category": row[1],
-            "form_type": row[2],
-            "settlement_type": row[3],
-            "name": row[4],
-            "view_type": row[5],
-            "description": row[6]
-        })
+    """, params)
 
-    return results
+    for rows in fetch_chunks(cursor):
+        yield from map(dict, rows)
 
 
 def retrieve_form_ids(conn: sqlite3.Connection) -> list[int]:
@@ -115,10 +156,24 @@ def retrieve_form_ids(conn: sqlite3.Connection) -> list[int]:
     Returns:
         list of int: List of form ids.
     """
+    return list(iter_form_ids(conn))
+
+
+def iter_form_ids(conn: sqlite3.Connection) -> Iterator[int]:
+    """Retrieve all form ids from the forms table one id at a time.
+
+    Args:
+        conn: SQLite3 connection object
+
+    Yields:
+        int: Form id.
+    """
     cursor = conn.cursor()
 
     cursor.execute("""
     SELECT id FROM forms
     """)
 
-    return [int(row[0]) for row in cursor.fetchall()]
+    # `id` is an INTEGER PRIMARY KEY, so it is already returned as int
+    for (form_id,) in cursor:
+        yield form_id
@@ -9,10 +9,43 @@ Functions
 ---------
 - `create_tables`: Create `groups` table in the database
 - `update`: Insert or update `groups` data in the database
+- `update_many`: Insert or update multiple `groups` data in the database
 - `retrieve`: Retrieve `groups` data from the database
+- `iter_retrieve`: Retrieve `groups` data from the database one row at a time
 """
 import sqlite3
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+from ._query import fetch_chunks, in_clause
+
+
+# rows whose columns are all unchanged are not rewritten
+_INSERT_GROUP_SQL = """
+INSERT INTO groups (group_code, group_name, parent_group_code, description)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (group_code) DO UPDATE SET
+    group_name = excluded.group_name,
+    parent_group_code = excluded.parent_group_code,
+    description = excluded.description
+WHERE (group_name, parent_group_code, description)
+    IS NOT (excluded.group_name, excluded.parent_group_code, excluded.description)
+"""
+
+# groups without a group_code never conflict on the primary key,
+# so they are matched by group_name instead
+_UPDATE_NULL_CODE_GROUP_SQL = """
+UPDATE groups SET parent_group_code = ?, description = ?
+WHERE group_code IS NULL AND group_name = ?
+    AND (parent_group_code, description) IS NOT (?, ?)
+"""
+
+_INSERT_NULL_CODE_GROUP_SQL = """
+INSERT INTO groups (group_code, group_name, parent_group_code, description)
+SELECT NULL, ?, ?, ?
+WHERE NOT EXISTS (
+    SELECT 1 FROM groups WHERE group_code IS NULL AND group_name = ?
+)
+"""
 
 
 
@@ -30,8 +63,7 @@ def create_tables(conn: sqlite3.Connection) -> None:
         group_code TEXT PRIMARY KEY,
         group_name TEXT,
         parent_group_code TEXT,
-        description TEXT,
-        UNIQUE (group_code, group_name)
+        description TEXT
     )
     """)
 
@@ -47,27 +79,47 @@ def update(conn: sqlite3.Connection,
         data: Group data to be inserted or updated.
               The data should be the 'results' element of the result from the '/v1/group/' API.
     """
+    update_many(conn, [data])
+
+
+def update_many(conn: sqlite3.Connection,
+                data_list: Iterable[dict]):
+    """Update multiple rows in the groups table in a single transaction.
+
+    Args:
+        conn: SQLite3 connection object
+        data_list: Group data to be inserted or updated.
+                   Each element should be the 'results' element of the result from the '/v1/group/' API.
+
+    Note:
+        Callers storing all the 'results' of the API should use this function
+        instead of calling `update` for each element, which commits every row.
+    """
+    data_list = list(data_list)
+    null_code_list = [data for data in data_list if data['group_code'] is None]
+
     cursor = conn.cursor()
 
-    cursor.execute("""
-    INSERT INTO groups (group_code, group_name, parent_group_code, description)
-    SELECT ?, ?, ?, ?
-    WHERE NOT EXISTS (
-        SELECT 1 FROM groups
-        WHERE group_name = ? AND
-            (
-                (? IS NULL AND group_code IS NULL) OR
-                (? IS NOT NULL AND group_code = ?)
-            )
-    );
-    """, (data['group_code'], data['group_name'], data['parent_group_code'], data['description'],
-          data['group_name'], data['group_code'], data['group_code'], data['group_code']))
+    cursor.executemany(_INSERT_GROUP_SQL, (
+        (data['group_code'], data['group_name'], data['parent_group_code'], data['description'])
+        for data in data_list
+        if data['group_code'] is not None
+    ))
+    cursor.executemany(_UPDATE_NULL_CODE_GROUP_SQL, (
+        (data['parent_group_code'], data['description'], data['group_name'],
+         data['parent_group_code'], data['description'])
+        for data in null_code_list
+    ))
+    cursor.executemany(_INSERT_NULL_CODE_GROUP_SQL, (
+        (data['group_name'], data['parent_group_code'], data['description'], data['group_name'])
+        for data in null_code_list
+    ))
 
     conn.commit()
 
 
 def retrieve(conn: sqlite3.Connection,
-             group_code:Optional[list[str]] = None):
+             group_code: Optional[list[str]] = None) -> list[dict]:
     """Read data from the groups table.
 
     Args:
@@ -79,29 +131,38 @@ def retrieve(conn: sqlite3.Connection,
     Returns:
         list of dict: Group data
     """
+    return list(iter_retrieve(conn, group_code))
+
+
+def iter_retrieve(conn: sqlite3.Connection,
+                  group_code: Optional[list[str]] = None) -> Iterator[dict]:
+    """Read data from the groups table one row at a time.
+
+    Args:
+        conn: SQLite3 connection object
+        group_code: list of str
+            List of group codes to be read from the table.
+            If empty or None, all data will be read.
+
+    Yields:
+        dict: Group data
+    """
     # If group_code is not specified, read all data
     if not group_code:
         group_code = []
 
     cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
 
+    placeholders, params = in_clause(group_code)
     where_statement = ''
     if group_code:
-        where_statement = f"WHERE group_code IN ({','.join(['?']*len(group_code))})"
+        where_statement = f"WHERE group_code IN ({placeholders})"
 
     # TODO Use JSON_ARRAY() to return the parent_group_code as a JSON array
     cursor.execute(f"""
     SELECT * FROM groups {where_statement}
-    """, group_code)
-
-    results = []
-
-    for row in cursor.fetchall():
-        results.append({
-            'group_code': row[0],
-            'group_name': row[1],
-            'parent_group_code': row[2],
-            'description': row[3]
-        })
+    """, params)
 
-    return results
+    for rows in fetch_chunks(cursor):
+        yield from map(dict, rows)
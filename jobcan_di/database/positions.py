@@ -9,10 +9,24 @@ Functions
 ---------
 - `create_tables`: Create `positions` table in the database
 - `update`: Insert or update `positions` data in the database
+- `update_many`: Insert or update multiple `positions` data in the database
 - `retrieve`: Retrieve `positions` data from the database
+- `iter_retrieve`: Retrieve `positions` data from the database one row at a time
 """
 import sqlite3
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+from ._query import fetch_chunks, in_clause
+
+
+_INSERT_POSITION_SQL = """
+INSERT INTO positions (position_code, position_name, description)
+VALUES (?, ?, ?)
+ON CONFLICT (position_code) DO UPDATE SET
+    position_name = excluded.position_name,
+    description = excluded.description
+WHERE (position_name, description) IS NOT (excluded.position_name, excluded.description)
+"""
 
 
 
@@ -45,18 +59,34 @@ def update(conn: sqlite3.Connection,
         data: Position data to be inserted or updated.
               The data should be the 'results' element of the result from the '/v1/positions/' API.
     """
+    update_many(conn, [data])
+
+
+def update_many(conn: sqlite3.Connection,
+                data_list: Iterable[dict]):
+    """Update multiple rows in the positions table in a single transaction.
+
+    Args:
+        conn: SQLite3 connection object
+        data_list: Position data to be inserted or updated.
+                   Each element should be the 'results' element of the result from the '/v1/positions/' API.
+
+    Note:
+        Callers storing all the 'results' of the API should use this function
+        instead of calling `update` for each element, which commits every row.
+    """
     cursor = conn.cursor()
 
-    cursor.execute("""
-    INSERT OR REPLACE INTO positions (position_code, position_name, description)
-    VALUES (?, ?, ?)
-    """, (data["position_code"], data["position_name"], data["description"]))
+    cursor.executemany(_INSERT_POSITION_SQL, (
+        (data["position_code"], data["position_name"], data["description"])
+        for data in data_list
+    ))
 
     conn.commit()
 
 
 def retrieve(conn: sqlite3.Connection,
-             position_code: Optional[list[str]] = None):
+             position_code: Optional[list[str]] = None) -> list[dict]:
     """Retrieve `positions` data from the positions table.
 
     Args:
@@ -68,28 +98,38 @@ def retrieve(conn: sqlite3.Connection,
     Returns:
         list of dict: List of position data.
     """
+    return list(iter_retrieve(conn, position_code))
+
+
+def iter_retrieve(conn: sqlite3.Connection,
+                  position_code: Optional[list[str]] = None) -> Iterator[dict]:
+    """Retrieve `positions` data from the positions table one row at a time.
+
+    Args:
+        conn: SQLite3 connection object
+        position_code: list of str
+            List of position codes to be read from the table.
+            If empty or None, all data will be read.
+
+    Yields:
+        dict: Position data.
+    """
     if position_code is None:
         position_code = []
 
     cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
 
+    placeholders, params = in_clause(position_code)
     where_statement = ""
     if position_code:
-        where_statement = f"WHERE position_code IN ({','.join(['?']*len(position_code))})"
+        where_statement = f"WHERE position_code IN ({placeholders})"
 
     # TODO: Use JSON_ARRAY() instead of for loop
     cursor.execute(f"""
     SELECT * FROM positions
     {where_statement}
-    """, position_code)
-
-    results = []
-
-    for row in cursor.fetchall():
-        results.append({
-            "position_code": row[0],
-            "position_name": row[1],
-            "description": row[2]
-        })
+    """, params)
 
-    return results
+    for rows in fetch_chunks(cursor):
+        yield from map(dict, rows)
@@ -9,11 +9,23 @@ Functions
 ---------
 - `create_tables`: Create `projects` table in the database
 - `update`: Update the `projects` table with the API response
+- `update_many`: Update the `projects` table with multiple API responses at once
 - `retrieve`: Retrieve project data from the `projects` table
+- `iter_retrieve`: Retrieve project data from the `projects` table one row at a time
 """
-import json
 import sqlite3
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+from ._query import fetch_chunks, in_clause
+
+
+_INSERT_PROJECT_SQL = """
+INSERT INTO projects (project_code, project_name)
+VALUES (?, ?)
+ON CONFLICT (project_code) DO UPDATE SET
+    project_name = excluded.project_name
+WHERE project_name IS NOT excluded.project_name
+"""
 
 
 
@@ -43,12 +55,27 @@ def update(conn: sqlite3.Connection,
         data: Project data to be inserted or updated.
               The data should be the 'results' element of the result from the '/v1/project/' API.
     """
+    update_many(conn, [data])
+
+def update_many(conn: sqlite3.Connection,
+                data_list: Iterable[dict]):
+    """Update multiple rows in the projects table in a single transaction.
+
+    Args:
+        conn: SQLite3 connection object
+        data_list: Project data to be inserted or updated.
+                   Each element should be the 'results' element of the result from the '/v1/project/' API.
+
+    Note:
+        Callers storing all the 'results' of the API should use this function
+        instead of calling `update` for each element, which commits every row.
+    """
     cursor = conn.cursor()
 
-    cursor.execute("""
-    INSERT OR REPLACE INTO projects (project_code, project_name)
-    VALUES (?, ?)
-    """, (data['project_code'], data['project_name']))
+    cursor.executemany(_INSERT_PROJECT_SQL, (
+        (data['project_code'], data['project_name'])
+        for data in data_list
+    ))
 
     conn.commit()
 
@@ -64,21 +91,34 @@ def retrieve(conn: sqlite3.Connection,
     Returns:
         dict: Project data
     """
-    cursor = conn.cursor()
+    return list(iter_retrieve(conn, project_code))
 
-    query = """
-    SELECT json_object(
-        'project_code', project_code,
-        'project_name', project_name
-    ) AS project_json
-    FROM projects
+def iter_retrieve(conn: sqlite3.Connection,
+                  project_code: Optional[list[str]] = None) -> Iterator[dict]:
+    """Retrieve project data from the database one row at a time.
+
+    Args:
+        conn: SQLite3 connection object
+        project_code: Project code(s) to retrieve data for
+                      If None, all project data is retrieved
+
+    Yields:
+        dict: Project data
     """
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
 
     if project_code is None:
-        cursor.execute(query)
+        where_clause, params = "", []
     else:
-        where_clause = f"WHERE project_code IN ({','.join(['?']*len(project_code))})"
-        cursor.execute(query + where_clause,
-                       project_code)
+        placeholders, params = in_clause(project_code)
+        where_clause = f"WHERE project_code IN ({placeholders})"
+
+    cursor.execute(f"""
+    SELECT project_code, project_name
+    FROM projects
+    {where_clause}
+    """, params)
 
-    return [json.loads(row[0]) for row in cursor.fetchall()]
+    for rows in fetch_chunks(cursor):
+        yield from map(dict, rows)
@@ -72,3 +72,11 @@ from ._viewers import retrieve_viewers
 from ._modify_logs import retrieve_modify_logs
 from ._default_attachment_files import retrieve_default_attachment_files
 from ._requests import update, retrieve, retrieve_ids, RequestStatus
+
+__all__ = [
+    "create_tables", "update", "retrieve", "retrieve_ids",
+    "retrieve_customized_items", "retrieve_expense", "retrieve_payment", "retrieve_ec",
+    "retrieve_approval_process", "retrieve_viewers", "retrieve_modify_logs",
+    "retrieve_default_attachment_files",
+    "CommentDataList", "FileDataList", "GenericMasterDataList", "RequestStatus"
+]
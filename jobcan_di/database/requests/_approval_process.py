@@ -11,13 +11,157 @@ Target
 - `/v1/requests/{request_id}` API (GET)
   - `detail` -> `approval_process`
 """
-import json
+from collections import defaultdict
+from operator import itemgetter
 import sqlite3
 from typing import Union
 
+from .._query import insert_values, select_values, upsert_returning_id
 from ._data_class import CommentDataList, FileDataList
 
 
+# fields of the API response written to each table (in the order of the columns)
+_MODIFY_LOG_FIELDS = itemgetter("date", "user_name")
+_APPROVER_FIELDS = itemgetter("status", "approved_date", "approver_name",
+                              "proxy_approver_name", "proxy_approver_code")
+_STEP_FIELDS = itemgetter("name", "condition", "status")
+
+# keys of the comments and files (in the order of the selected columns)
+_COMMENT_KEYS = ("user_name", "date", "text", "deleted")
+_FILE_KEYS = ("user_name", "date", "id", "name", "type", "deleted")
+
+_INSERT_APPROVAL_ROUTE_MODIFY_LOG_SQL = """
+INSERT INTO approval_route_modify_logs (approval_process_id, date, user_name, log_index)
+VALUES {values}
+ON CONFLICT(approval_process_id, log_index) DO UPDATE SET
+    date = excluded.date,
+    user_name = excluded.user_name
+"""
+
+_INSERT_APPROVER_SQL = """
+INSERT INTO approvers (approval_step_id, status, approved_date, approver_name,
+                       proxy_approver_name, proxy_approver_code,
+                       approver_index)
+VALUES {values}
+ON CONFLICT(approval_step_id, approver_index) DO UPDATE SET
+    status = excluded.status,
+    approved_date = excluded.approved_date,
+    approver_name = excluded.approver_name,
+    proxy_approver_name = excluded.proxy_approver_name,
+    proxy_approver_code = excluded.proxy_approver_code
+"""
+
+_INSERT_APPROVAL_STEP_SQL = """
+INSERT INTO approval_steps (approval_process_id, name, condition, status, step_index)
+VALUES {values}
+ON CONFLICT(approval_process_id, step_index) DO UPDATE SET
+    name = excluded.name,
+    condition = excluded.condition,
+    status = excluded.status
+"""
+
+_SELECT_APPROVAL_STEP_IDS_SQL = """
+SELECT step_index, id FROM approval_steps WHERE approval_process_id = ?
+"""
+
+_INSERT_APPROVAL_PROCESS_SQL = """
+INSERT INTO approval_process (request_id, is_route_changed_by_applicant)
+VALUES (?, ?)
+ON CONFLICT(request_id) DO UPDATE SET
+    is_route_changed_by_applicant = excluded.is_route_changed_by_applicant
+WHERE is_route_changed_by_applicant IS NOT excluded.is_route_changed_by_applicant
+"""
+
+_SELECT_APPROVAL_PROCESS_ID_SQL = """
+SELECT id FROM approval_process WHERE request_id = ?
+"""
+
+_SELECT_COMMENT_IDS_SQL = """
+SELECT c.user_name, c.date, c.text, c.id
+FROM (VALUES {values}) AS v
+JOIN comments c ON c.user_name = v.column1 AND c.date = v.column2 AND c.text IS v.column3
+"""
+
+_UPDATE_COMMENT_SQL = """
+UPDATE comments SET deleted = ? WHERE id = ?
+"""
+
+_INSERT_COMMENT_SQL = """
+INSERT INTO comments (user_name, date, text, deleted) VALUES (?, ?, ?, ?)
+"""
+
+_INSERT_COMMENT_ASSOCIATION_SQL = """
+INSERT INTO comment_associations (comment_id, approval_step_id, approval_after_completion_id)
+VALUES (?, ?, ?)
+ON CONFLICT(comment_id) DO UPDATE SET
+    approval_step_id = excluded.approval_step_id,
+    approval_after_completion_id = excluded.approval_after_completion_id
+"""
+
+_SELECT_APPROVAL_PROCESS_SQL = """
+SELECT id, is_route_changed_by_applicant FROM approval_process WHERE request_id = ?
+"""
+
+_SELECT_APPROVAL_ROUTE_MODIFY_LOGS_SQL = """
+SELECT date, user_name
+FROM approval_route_modify_logs
+WHERE approval_process_id = ?
+ORDER BY log_index
+"""
+
+_SELECT_APPROVAL_STEPS_SQL = """
+SELECT id, name, condition, status
+FROM approval_steps
+WHERE approval_process_id = ?
+ORDER BY step_index
+"""
+
+_SELECT_APPROVERS_SQL = """
+SELECT a.approval_step_id, a.status, a.approved_date, a.approver_name,
+       a.proxy_approver_name, a.proxy_approver_code
+FROM approval_steps ast
+JOIN approvers a ON a.approval_step_id = ast.id
+WHERE ast.approval_process_id = ?
+ORDER BY a.approval_step_id, a.approver_index
+"""
+
+# comments / files of the steps (approval_step_id) and of the after completion
+# (approval_after_completion_id) of an approval process, keyed by the owner id
+_SELECT_STEP_COMMENTS_SQL = """
+SELECT ca.approval_step_id, c.user_name, c.date, c.text, c.deleted
+FROM approval_steps ast
+JOIN comment_associations ca ON ca.approval_step_id = ast.id
+JOIN comments c ON c.id = ca.comment_id
+WHERE ast.approval_process_id = ?
+ORDER BY ca.id
+"""
+
+_SELECT_AFTER_COMPLETION_COMMENTS_SQL = """
+SELECT ca.approval_after_completion_id, c.user_name, c.date, c.text, c.deleted
+FROM comment_associations ca
+JOIN comments c ON c.id = ca.comment_id
+WHERE ca.approval_after_completion_id = ?
+ORDER BY ca.id
+"""
+
+_SELECT_STEP_FILES_SQL = """
+SELECT fa.approval_step_id, f.user_name, f.date, f.id, f.name, f.type, f.deleted
+FROM approval_steps ast
+JOIN file_associations fa ON fa.approval_step_id = ast.id
+JOIN files f ON f.id = fa.file_id
+WHERE ast.approval_process_id = ?
+ORDER BY fa.id
+"""
+
+_SELECT_AFTER_COMPLETION_FILES_SQL = """
+SELECT fa.approval_after_completion_id, f.user_name, f.date, f.id, f.name, f.type, f.deleted
+FROM file_associations fa
+JOIN files f ON f.id = fa.file_id
+WHERE fa.approval_after_completion_id = ?
+ORDER BY fa.id
+"""
+
+
 
 def _update_approval_route_modify_logs(
         cursor:sqlite3.Cursor,
@@ -31,14 +175,10 @@ def _update_approval_route_modify_logs(
             of the request
         ap_id: Approval process ID
     """
-    for i, modify_log in enumerate(modify_logs):
-        cursor.execute("""
-        INSERT INTO approval_route_modify_logs (approval_process_id, date, user_name, log_index)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(approval_process_id, log_index) DO UPDATE SET
-            date = excluded.date,
-            user_name = excluded.user_name
-        """, (ap_id, modify_log["date"], modify_log["user_name"], i))
+    insert_values(cursor, _INSERT_APPROVAL_ROUTE_MODIFY_LOG_SQL, (
+        (ap_id, *_MODIFY_LOG_FIELDS(modify_log), i)
+        for i, modify_log in enumerate(modify_logs)
+    ))
 
     # TODO: remove items from 'approval_route_modify_logs' table if the number of items is less than before
 
@@ -54,22 +194,10 @@ def _update_approval_step_approvers(
         approvers: 'approvers' element of the approval step
         as_id: Approval step ID
     """
-    for i, a_i in enumerate(approvers):
-        cursor.execute("""
-        INSERT INTO approvers (approval_step_id, status, approved_date, approver_name,
-                               proxy_approver_name, proxy_approver_code,
-                               approver_index)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(approval_step_id, approver_index) DO UPDATE SET
-            status = excluded.status,
-            approved_date = excluded.approved_date,
-            approver_name = excluded.approver_name,
-            proxy_approver_name = excluded.proxy_approver_name,
-            proxy_approver_code = excluded.proxy_approver_code
-        """, (
-            as_id, a_i["status"], a_i["approved_date"], a_i["approver_name"],
-            a_i["proxy_approver_name"], a_i["proxy_approver_code"], i
-        ))
+    insert_values(cursor, _INSERT_APPROVER_SQL, (
+        (as_id, *_APPROVER_FIELDS(a_i), i)
+        for i, a_i in enumerate(approvers)
+    ))
 
     # TODO: remove items from 'approvers' table if the number of items is less than before
 
@@ -89,20 +217,19 @@ def _update_approval_steps(
         f_list: FileDataList object
         c_list: CommentDataList object
     """
+    if not steps:
+        return
+
+    insert_values(cursor, _INSERT_APPROVAL_STEP_SQL, (
+        (ap_id, *_STEP_FIELDS(as_i), i)
+        for i, as_i in enumerate(steps)
+    ))
+    # get the ids of all the steps at once
+    cursor.execute(_SELECT_APPROVAL_STEP_IDS_SQL, (ap_id,))
+    as_ids = dict(cursor.fetchall())
+
     for i, as_i in enumerate(steps):
-        cursor.execute("""
-        INSERT INTO approval_steps (approval_process_id, name, condition, status, step_index)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(approval_process_id, step_index) DO UPDATE SET
-            name = excluded.name,
-            condition = excluded.condition,
-            status = excluded.status
-        """, (ap_id, as_i["name"], as_i["condition"], as_i["status"], i))
-        # get the last inserted row id
-        cursor.execute(
-            "SELECT id FROM approval_steps WHERE approval_process_id = ? AND step_index = ?",
-            (ap_id, i))
-        as_i_id = cursor.fetchone()[0]
+        as_i_id = as_ids[i]
 
         # update "approvers" table
         if as_i["approvers"] is not None:
@@ -110,13 +237,11 @@ def _update_approval_steps(
 
         # update comments
         _comments = as_i["comments"] if as_i["comments"] is not None else []
-        for c_i in _comments:
-            c_list.add_comment(c_i, as_i_id, None)
+        c_list.extend_comments(_comments, as_i_id, None)
 
         # add file data
         _files = as_i["files"] if as_i["files"] is not None else []
-        for f_i in _files:
-            f_list.add_file(f_i, 3, as_i_id)
+        f_list.extend_files(_files, 3, as_i_id)
 
     # TODO: remove items from 'approval_steps' table if the number of items is less than before
 
@@ -136,13 +261,11 @@ def _update_approval_after_completion(
     """
     # add comments
     _comments = _cmt if (_cmt:=after_completion["comments"]) is not None else []
-    for c_i in _comments:
-        c_list.add_comment(c_i, None, ap_id)
+    c_list.extend_comments(_comments, None, ap_id)
 
     # add file data
     _files = _f if (_f:=after_completion["files"]) is not None else []
-    for f_i in _files:
-        f_list.add_file(f_i, 4, ap_id)
+    f_list.extend_files(_files, 4, ap_id)
 
 
 def update_approval_process(
@@ -164,15 +287,9 @@ def update_approval_process(
     # comments
     c_list = CommentDataList()
 
-    cursor.execute("""
-    INSERT INTO approval_process (request_id, is_route_changed_by_applicant)
-    VALUES (?, ?)
-    ON CONFLICT(request_id) DO UPDATE SET
-        is_route_changed_by_applicant = excluded.is_route_changed_by_applicant
-    """, (request_id, ap["is_route_changed_by_applicant"]))
-    # get the last inserted row id
-    cursor.execute("SELECT id FROM approval_process WHERE request_id = ?", (request_id,))
-    ap_id = cursor.fetchone()[0]
+    ap_id = upsert_returning_id(
+        cursor, _INSERT_APPROVAL_PROCESS_SQL, (request_id, ap["is_route_changed_by_applicant"]),
+        _SELECT_APPROVAL_PROCESS_ID_SQL, (request_id,))
 
     # update "approval_route_modify_logs" table
     if ap["approval_route_modify_logs"] is not None:
@@ -192,6 +309,24 @@ def update_approval_process(
 # -> 'comments' and 'comment_associations'
 
 
+def _select_comment_ids(cursor:sqlite3.Cursor,
+                        comments:list[tuple]) -> dict[tuple, int]:
+    """Select the IDs of the comments already in the 'comments' table.
+
+    Args:
+        cursor: SQLite3 cursor object
+        comments: Comment data ([user_name, date, text, ...])
+
+    Returns:
+        IDs of the comments found in the table, keyed by (user_name, date, text)
+    """
+    return {
+        (user_name, date, text): c_id
+        for user_name, date, text, c_id
+        in select_values(cursor, _SELECT_COMMENT_IDS_SQL, (c_i[:3] for c_i in comments))
+    }
+
+
 def _update_comments(cursor:sqlite3.Cursor,
                      c_list:CommentDataList) -> None:
     """Update 'comments' and 'comment_associations' tables.
@@ -201,43 +336,59 @@ def _update_comments(cursor:sqlite3.Cursor,
         c_list: CommentDataList object
     """
     # update 'comment' table
-    comment_ids = []
-    for c_i in c_list.get_comment_data():
-        # check if the record already exists
-        cursor.execute("""SELECT id FROM comments
-        WHERE user_name = ? AND date = ? AND (
-            (text IS NULL AND ? IS NULL) OR text = ?
-        );""", (c_i[0], c_i[1], c_i[2], c_i[2]))
-        existing_id = cursor.fetchone()
-        if existing_id is not None:
-            cursor.execute("UPDATE comments SET deleted = ? WHERE id = ?",
-                           (c_i[3], existing_id[0]))
-            comment_ids.append(existing_id[0])
-        else:
-            cursor.execute(
-                "INSERT INTO comments (user_name, date, text, deleted) VALUES (?, ?, ?, ?)",
-                c_i
-            )
-            # get the last inserted row id
-            cursor.execute("""SELECT id FROM comments
-            WHERE user_name = ? AND date = ? AND (
-                (text IS NULL AND ? IS NULL) OR text = ?
-            );""", (c_i[0], c_i[1], c_i[2], c_i[2]))
-            comment_ids.append(cursor.fetchone()[0])
-    c_list.set_comment_ids(comment_ids)
+    # (comments in c_list are already unique by user_name, date and text)
+    comments = c_list.get_comment_data()
+    if not comments:
+        return
+    existing_ids = _select_comment_ids(cursor, comments)
+
+    cursor.executemany(_UPDATE_COMMENT_SQL, (
+        (c_i[3], existing_ids[c_i[:3]]) for c_i in comments if c_i[:3] in existing_ids
+    ))
+    new_comments = [c_i for c_i in comments if c_i[:3] not in existing_ids]
+    if new_comments:
+        cursor.executemany(_INSERT_COMMENT_SQL, new_comments)
+        # get the ids of the inserted comments
+        existing_ids.update(_select_comment_ids(cursor, new_comments))
+
+    c_list.set_comment_ids([existing_ids[c_i[:3]] for c_i in comments])
 
     # update 'comment_associations' table
-    cursor.executemany("""
-    INSERT INTO comment_associations (comment_id, approval_step_id, approval_after_completion_id)
-    VALUES (?, ?, ?)
-    ON CONFLICT(comment_id) DO UPDATE SET
-        approval_step_id = excluded.approval_step_id,
-        approval_after_completion_id = excluded.approval_after_completion_id
-    """, c_list.get_comment_association_data())
+    cursor.executemany(_INSERT_COMMENT_ASSOCIATION_SQL, c_list.get_comment_association_data())
 
     # TODO: remove items from 'comment_associations' table if the number of items is less than before
 
 
+def _to_bool(value) -> Union[bool,None]:
+    """Convert a BOOLEAN column (1, 0 or NULL) to bool or None."""
+    return None if value is None else value == 1
+
+
+def _group_by_owner(cursor:sqlite3.Cursor,
+                    sql:str,
+                    owner_id:int,
+                    keys:tuple[str, ...]) -> defaultdict[int, list[dict]]:
+    """Group the rows of a query by the id in their first column.
+
+    Args:
+        cursor: SQLite3 cursor object
+        sql: Query whose first column is the id of the owner (e.g. the approval step)
+        owner_id: Parameter of `sql` (the approval process ID)
+        keys: Keys of the remaining columns
+
+    Returns:
+        Rows converted to dicts, keyed by the owner id.
+        The `deleted` column is converted to bool.
+    """
+    grouped = defaultdict(list)
+    for owner, *values in cursor.execute(sql, (owner_id,)):
+        row = dict(zip(keys, values))
+        if "deleted" in row:
+            row["deleted"] = _to_bool(row["deleted"])
+        grouped[owner].append(row)
+    return grouped
+
+
 def retrieve_approval_process(cursor:sqlite3.Cursor,
                               request_id:str) -> dict:
     """Retrieve 'approval_process' data from the database.
@@ -250,123 +401,47 @@ def retrieve_approval_process(cursor:sqlite3.Cursor,
         Approval process data.
         The data structure is similar to the `detail`->`approval_process` element
         in the response of the `/v1/requests/{request_id}` API.
+
+    Note:
+        Each list is read by a plain query and the dict is built in Python,
+        instead of being serialized by SQLite's JSON functions and parsed again.
     """
-    cursor.execute("""
-    SELECT JSON_OBJECT(
-        'is_route_changed_by_applicant', CASE WHEN ap.is_route_changed_by_applicant=1 THEN json('true')
-                                              WHEN ap.is_route_changed_by_applicant=0 THEN json('false')
-                                              ELSE NULL END,
-        'approval_route_modify_logs', (
-            SELECT JSON_GROUP_ARRAY(
-                JSON_OBJECT(
-                    'date', arml.date,
-                    'user_name', arml.user_name
-                )
-            )
-            FROM approval_route_modify_logs arml
-            WHERE arml.approval_process_id = ap.id
-            ORDER BY arml.log_index
-        ),
-        'steps', (
-            SELECT JSON_GROUP_ARRAY(
-                JSON_OBJECT(
-                    'name', ast.name,
-                    'condition', ast.condition,
-                    'status', ast.status,
-                    'approvers', (
-                        SELECT JSON_GROUP_ARRAY(
-                            JSON_OBJECT(
-                                'status', a.status,
-                                'approved_date', a.approved_date,
-                                'approver_name', a.approver_name,
-                                'proxy_approver_name', a.proxy_approver_name,
-                                'proxy_approver_code', a.proxy_approver_code
-                            )
-                        )
-                        FROM approvers a
-                        WHERE a.approval_step_id = ast.id
-                        ORDER BY a.approver_index
-                    ),
-                    'comments', (
-                        SELECT JSON_GROUP_ARRAY(
-                            JSON_OBJECT(
-                                'user_name', c.user_name,
-                                'date', c.date,
-                                'text', c.text,
-                                'deleted', CASE WHEN c.deleted=1 THEN json('true')
-                                                WHEN c.deleted=0 THEN json('false')
-                                                ELSE NULL END
-                            )
-                        )
-                        FROM comments c
-                        JOIN comment_associations ca ON c.id = ca.comment_id
-                        WHERE ca.approval_step_id = ast.id
-                    ),
-                    'files', (
-                        SELECT JSON_GROUP_ARRAY(
-                            JSON_OBJECT(
-                                'user_name', f.user_name,
-                                'date', f.date,
-                                'id', f.id,
-                                'name', f.name,
-                                'type', f.type,
-                                'deleted', CASE WHEN f.deleted=1 THEN json('true')
-                                                WHEN f.deleted=0 THEN json('false')
-                                                ELSE NULL END
-                            )
-                        )
-                        FROM file_associations fa
-                        JOIN files f ON fa.file_id = f.id
-                        WHERE fa.approval_step_id = ast.id
-                    )
-                )
-            )
-            FROM approval_steps ast
-            WHERE ast.approval_process_id = ap.id
-            ORDER BY ast.step_index
-        ),
-        'after_completion', (
-            SELECT JSON_OBJECT(
-                'comments', (
-                    SELECT JSON_GROUP_ARRAY(
-                        JSON_OBJECT(
-                            'user_name', c.user_name,
-                            'date', c.date,
-                            'text', c.text,
-                            'deleted', CASE WHEN c.deleted=1 THEN json('true')
-                                            WHEN c.deleted=0 THEN json('false')
-                                            ELSE NULL END
-                        )
-                    )
-                    FROM comments c
-                    JOIN comment_associations ca ON c.id = ca.comment_id
-                    WHERE ca.approval_after_completion_id = ap.id
-                ),
-                'files', (
-                    SELECT JSON_GROUP_ARRAY(
-                        JSON_OBJECT(
-                            'user_name', f.user_name,
-                            'date', f.date,
-                            'id', f.id,
-                            'name', f.name,
-                            'type', f.type,
-                            'deleted', CASE WHEN f.deleted=1 THEN json('true')
-                                            WHEN f.deleted=0 THEN json('false')
-                                            ELSE NULL END
-                        )
-                    )
-                    FROM file_associations fa
-                    JOIN files f ON fa.file_id = f.id
-                    WHERE fa.approval_after_completion_id = ap.id
-                )
-            )
-        )
-    )
-    FROM approval_process ap
-    WHERE request_id = ?;
-    """, (request_id,))
+    cursor.execute(_SELECT_APPROVAL_PROCESS_SQL, (request_id,))
     result = cursor.fetchone()
     if result is None:
         return None
-
-    return json.loads(result[0])
+    ap_id, is_route_changed = result
+
+    modify_logs = [
+        {"date": date, "user_name": user_name}
+        for date, user_name in cursor.execute(_SELECT_APPROVAL_ROUTE_MODIFY_LOGS_SQL, (ap_id,))
+    ]
+    steps = cursor.execute(_SELECT_APPROVAL_STEPS_SQL, (ap_id,)).fetchall()
+
+    approvers = _group_by_owner(
+        cursor, _SELECT_APPROVERS_SQL, ap_id,
+        ("status", "approved_date", "approver_name", "proxy_approver_name", "proxy_approver_code"))
+    comments = _group_by_owner(cursor, _SELECT_STEP_COMMENTS_SQL, ap_id, _COMMENT_KEYS)
+    files = _group_by_owner(cursor, _SELECT_STEP_FILES_SQL, ap_id, _FILE_KEYS)
+
+    return {
+        "is_route_changed_by_applicant": _to_bool(is_route_changed),
+        "approval_route_modify_logs": modify_logs,
+        "steps": [
+            {
+                "name": name,
+                "condition": condition,
+                "status": status,
+                "approvers": approvers[as_id],
+                "comments": comments[as_id],
+                "files": files[as_id]
+            }
+            for as_id, name, condition, status in steps
+        ],
+        "after_completion": {
+            "comments": _group_by_owner(
+                cursor, _SELECT_AFTER_COMPLETION_COMMENTS_SQL, ap_id, _COMMENT_KEYS)[ap_id],
+            "files": _group_by_owner(
+                cursor, _SELECT_AFTER_COMPLETION_FILES_SQL, ap_id, _FILE_KEYS)[ap_id]
+        }
+    }
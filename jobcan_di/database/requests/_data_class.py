@@ -8,7 +8,7 @@ The classes are as follows:
     - CommentDataList: Used to store comment data and comment associations.
     - GenericMasterDataList: Used to store generic master data and additional items.
 """
-from typing import Union
+from typing import Iterable, Union
 
 class FileDataList:
     """This class is used to store file data and file associations.
@@ -30,10 +30,12 @@ class FileDataList:
         f_data_list = FileDataList(request_id)
         ```
 
-        Then, add file data to the list using the add_file method.
+        Then, add file data to the list using the add_file method
+        (or the extend_files method for a list of files).
 
         ```python
         f_data_list.add_file(file_data, parent_type, parent_id)
+        f_data_list.extend_files(files, parent_type, parent_id)
         ```
 
         Finally, get the file data and file association data using the get_file_data
@@ -76,6 +78,8 @@ class FileDataList:
         ]
         ```
         """
+        self._index = {}
+        """index of each file in ``files``, keyed by file_id"""
 
     def add_file(self, file_data:dict, parent_type:int, parent_id) -> None:
         """Add file data to the list.
@@ -102,13 +106,10 @@ class FileDataList:
         date = file_data.get('date', None)
         deleted = file_data.get('deleted', False)
 
-        idx = -1
-        for i, _ in enumerate(self.files):
-            if self.files[i][0] == file_id:
-                # the file is already in the list
-                idx = i
+        idx = self._index.get(file_id, -1)
 
         if idx == -1:
+            self._index[file_id] = len(self.files)
             self.files.append([file_id, name, _type, user_name, date, deleted])
             self.f_info.append([self.request_id, file_id, None, None, None, None, None, 0])
         else:
@@ -126,6 +127,18 @@ class FileDataList:
         elif parent_type == 5:
             self.f_info[idx][7] += 1
 
+    def extend_files(self, files:Iterable[dict], parent_type:int, parent_id) -> None:
+        """Add the file data of a list of files with the same parent.
+
+        Args:
+            files: List of file data (see `add_file`)
+            parent_type: Type of the parent (see `add_file`)
+            parent_id: ID of the parent (see `add_file`)
+        """
+        add_file = self.add_file
+        for file_data in files:
+            add_file(file_data, parent_type, parent_id)
+
     def get_file_data(self) -> list[tuple]:
         """Return the file data.
 
@@ -160,12 +173,16 @@ class CommentDataList:
         c_data_list = CommentDataList()
         ```
 
-        Then, add comment data to the list using the add_comment method.
+        Then, add comment data to the list using the add_comment method
+        (or the extend_comments method for a list of comments).
 
         ```python
         c_data_list.add_comment(comment_data,
                                 approval_step_id,
                                 approval_after_completion_id)
+        c_data_list.extend_comments(comments,
+                                    approval_step_id,
+                                    approval_after_completion_id)
         ```
 
         Next, save the comment data to the database and get the comment IDs.
@@ -209,6 +226,8 @@ class CommentDataList:
         ]
         ```
         """
+        self._index = {}
+        """index of each comment in ``comments``, keyed by (user_name, date, text)"""
 
     def add_comment(self,
                     comment_data:dict,
@@ -231,15 +250,10 @@ class CommentDataList:
         text = comment_data['text']
         deleted = comment_data['deleted']
 
-        idx = -1
-        for i, _ in enumerate(self.comments):
-            if (self.comments[i][0] == user_name
-                and self.comments[i][1] == date
-                and self.comments[i][2] == text):
-                # the comment is already in the list
-                idx = i
+        idx = self._index.get((user_name, date, text), -1)
 
         if idx == -1:
+            self._index[(user_name, date, text)] = len(self.comments)
             self.comments.append([user_name, date, text, deleted])
             self.c_info.append([None, approval_step_id, approval_after_completion_id])
         else:
@@ -253,6 +267,22 @@ class CommentDataList:
         if approval_after_completion_id is not None:
             self.c_info[idx][2] = approval_after_completion_id
 
+    def extend_comments(self,
+                        comments:Iterable[dict],
+                        approval_step_id:Union[int,None],
+                        approval_after_completion_id:Union[int,None]
+        ) -> None:
+        """Add the comment data of a list of comments with the same parent.
+
+        Args:
+            comments: List of comment data (see `add_comment`)
+            approval_step_id: Approval step ID (int)
+            approval_after_completion_id: Approval after completion ID (int)
+        """
+        add_comment = self.add_comment
+        for comment_data in comments:
+            add_comment(comment_data, approval_step_id, approval_after_completion_id)
+
     def set_comment_ids(self, comment_ids:list[int]) -> None:
         """Set comment IDs.
 
@@ -341,6 +371,9 @@ class GenericMasterDataList:
             generic_master_id,
             [item_value, ...]
         ]"""
+        self._index = {}
+        """index of each generic master in ``generic_masters``,
+        keyed by (record_name, record_code, (item_value, ...))"""
 
     def add_generic_master(self,
                            data:dict,
@@ -360,15 +393,12 @@ class GenericMasterDataList:
         record_code = data['record_code']
         additional_items = data['additional_items']
 
-        idx = -1
-        for i, _ in enumerate(self.generic_masters):
-            if (self.generic_masters[i][0] == record_name and
-                self.generic_masters[i][1] == record_code and
-                self.additional_items[i][1] == additional_items):
-                # the generic master is already in the list
-                idx = i
+        key = (record_name, record_code,
+               tuple(additional_items) if additional_items is not None else None)
+        idx = self._index.get(key, -1)
 
         if idx == -1:
+            self._index[key] = len(self.generic_masters)
             self.generic_masters.append([record_name, record_code,
                                          customized_item_id, table_data_id])
             self.additional_items.append([None, additional_items])
@@ -33,8 +33,7 @@ def update_default_attachment_files(
     if daf is None:
         return
 
-    for f_i in daf:
-        f_list.add_file(f_i, 5, None)
+    f_list.extend_files(daf, 5, None)
 
 
 def retrieve_default_attachment_files(
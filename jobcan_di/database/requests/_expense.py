@@ -144,8 +144,7 @@ def _update_expense_specific_rows(
 
         # add file data
         _files = esr_i['files'] if esr_i['files'] is not None else []
-        for f_i in _files:
-            f_list.add_file(f_i, 1, esr_i_id)
+        f_list.extend_files(_files, 1, esr_i_id)
 
     # TODO: remove items from 'expense_specific_rows' table if the number of items is less than before
 
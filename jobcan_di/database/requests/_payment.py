@@ -70,8 +70,7 @@ def _update_payment_specific_rows(
 
         # add file data
         _files = psr_i["files"] if psr_i["files"] is not None else []
-        for f_i in _files:
-            f_list.add_file(f_i, 2, psr_i_id)
+        f_list.extend_files(_files, 2, psr_i_id)
 
         # TODO: remove items from 'payment_specific_rows' table if the number of items is less than before
 
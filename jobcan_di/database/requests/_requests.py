@@ -64,62 +64,63 @@ def update(conn:sqlite3.Connection,
         data: Data to be inserted or updated.
               The data should be the result from the '/v1/request/{request_id}/' API.
     """
-    cursor = conn.cursor()
-
-    f_list = FileDataList(data['id'])
-
-    # update 'requests' table
-    cursor.execute(f"""
-    INSERT OR REPLACE INTO requests (
-        id, title, status, form_id, form_name, form_type, settlement_type,
-        applied_date, applicant_code, applicant_last_name, applicant_first_name,
-        applicant_group_name, applicant_group_code, applicant_position_name,
-        proxy_applicant_last_name, proxy_applicant_first_name, group_name, group_code,
-        project_name, project_code, flow_step_name, is_content_changed, total_amount,
-        pay_at, final_approval_period, final_approved_date
-    ) VALUES ( {'?, ' * 25} ? )""", (
-        data["id"], data["title"], data["status"],
-        data["form_id"], data["form_name"], data["form_type"],
-        data["settlement_type"], data["applied_date"],
-        data["applicant_code"],
-        data["applicant_last_name"], data["applicant_first_name"],
-        data["applicant_group_name"], data["applicant_group_code"],
-        data["applicant_position_name"],
-        data["proxy_applicant_last_name"], data["proxy_applicant_first_name"],
-        data["group_name"], data["group_code"], data["project_name"], data["project_code"],
-        data["flow_step_name"], data["is_content_changed"], data["total_amount"],
-        data["pay_at"], data["final_approval_period"], data["final_approved_date"]
-    ))
-
-    # update "customized_items" table
-    detail = data["detail"]
-    update_customized_items(cursor, detail, data["id"], f_list)
-
-    # update "expense" table
-    update_expense(cursor, detail["expense"], data["id"], f_list)
-
-    # update "payment" table
-    update_payment(cursor, detail["payment"], data["id"], f_list)
-
-    # update "ec" table
-    update_ec(cursor, detail["ec"], data["id"])
-
-    # update "approval_process" table
-    update_approval_process(cursor, detail["approval_process"], data["id"], f_list)
-
-    # update "viewers" table
-    update_viewers(cursor, detail["viewers"], data["id"])
-
-    # update "modify_logs" table
-    update_modify_logs(cursor, detail["modify_logs"], data["id"])
-
-    # update "default_attachment_files" table
-    update_default_attachment_files(detail["default_attachment_files"], f_list)
-
-    # update "file" table
-    _update_files(cursor, f_list)
-
-    conn.commit()
+    # all the tables are updated in a single transaction,
+    # which is rolled back if any of the updates fails
+    with conn:
+        cursor = conn.cursor()
+
+        f_list = FileDataList(data['id'])
+
+        # update 'requests' table
+        cursor.execute(f"""
+        INSERT OR REPLACE INTO requests (
+            id, title, status, form_id, form_name, form_type, settlement_type,
+            applied_date, applicant_code, applicant_last_name, applicant_first_name,
+            applicant_group_name, applicant_group_code, applicant_position_name,
+            proxy_applicant_last_name, proxy_applicant_first_name, group_name, group_code,
+            project_name, project_code, flow_step_name, is_content_changed, total_amount,
+            pay_at, final_approval_period, final_approved_date
+        ) VALUES ( {'?, ' * 25} ? )""", (
+            data["id"], data["title"], data["status"],
+            data["form_id"], data["form_name"], data["form_type"],
+            data["settlement_type"], data["applied_date"],
+            data["applicant_code"],
+            data["applicant_last_name"], data["applicant_first_name"],
+            data["applicant_group_name"], data["applicant_group_code"],
+            data["applicant_position_name"],
+            data["proxy_applicant_last_name"], data["proxy_applicant_first_name"],
+            data["group_name"], data["group_code"], data["project_name"], data["project_code"],
+            data["flow_step_name"], data["is_content_changed"], data["total_amount"],
+            data["pay_at"], data["final_approval_period"], data["final_approved_date"]
+        ))
+
+        # update "customized_items" table
+        detail = data["detail"]
+        update_customized_items(cursor, detail, data["id"], f_list)
+
+        # update "expense" table
+        update_expense(cursor, detail["expense"], data["id"], f_list)
+
+        # update "payment" table
+        update_payment(cursor, detail["payment"], data["id"], f_list)
+
+        # update "ec" table
+        update_ec(cursor, detail["ec"], data["id"])
+
+        # update "approval_process" table
+        update_approval_process(cursor, detail["approval_process"], data["id"], f_list)
+
+        # update "viewers" table
+        update_viewers(cursor, detail["viewers"], data["id"])
+
+        # update "modify_logs" table
+        update_modify_logs(cursor, detail["modify_logs"], data["id"])
+
+        # update "default_attachment_files" table
+        update_default_attachment_files(detail["default_attachment_files"], f_list)
+
+        # update "file" table
+        _update_files(cursor, f_list)
 
 
 def retrieve(cursor:sqlite3.Cursor,
@@ -246,6 +247,4 @@ def retrieve_ids(
         query += " AND status NOT IN (" + ", ".join("?" * len(ant_status)) + ")"
         params.extend(s.value for s in ant_status)
 
-    cursor.execute(query, params)
-
-    return [r[0] for r in cursor.fetchall()]
+    return [r[0] for r in cursor.execute(query, params)]
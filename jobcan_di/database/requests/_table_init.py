@@ -110,6 +110,17 @@ def create_tables(conn: sqlite3.Connection) -> None:
         FOREIGN KEY (table_data_id) REFERENCES table_data(id)
     );''')
 
+    # UNIQUE (customized_item_id, table_data_id) does not match rows with NULL,
+    # so this index is used as the conflict target of the upsert instead
+    cursor.execute('''
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_generic_masters_ci_ti
+    ON generic_masters (COALESCE(customized_item_id, -1), COALESCE(table_data_id, -1));''')
+
+    # lookup of the generic master of a table cell (on retrieval)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_generic_masters_table_data_id
+    ON generic_masters (table_data_id);''')
+
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS generic_master_additional_items (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -366,6 +377,14 @@ def create_tables(conn: sqlite3.Connection) -> None:
         FOREIGN KEY (approval_after_completion_id) REFERENCES approval_process(id)
     );''')
 
+    # lookup of the comments of an approval step / after completion (on retrieval)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_comment_associations_approval_step_id
+    ON comment_associations (approval_step_id);''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_comment_associations_approval_after_completion_id
+    ON comment_associations (approval_after_completion_id);''')
+
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS viewers (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -445,4 +464,21 @@ def create_tables(conn: sqlite3.Connection) -> None:
         FOREIGN KEY (approval_after_completion_id) REFERENCES approval_process(id)
     );''')
 
+    # lookup of the files of each element holding a list of files (on retrieval)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_file_associations_customized_item_id
+    ON file_associations (customized_item_id);''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_file_associations_expense_specific_row_id
+    ON file_associations (expense_specific_row_id);''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_file_associations_payment_specific_row_id
+    ON file_associations (payment_specific_row_id);''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_file_associations_approval_step_id
+    ON file_associations (approval_step_id);''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_file_associations_approval_after_completion_id
+    ON file_associations (approval_after_completion_id);''')
+
     conn.commit()
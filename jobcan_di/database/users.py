@@ -15,6 +15,8 @@ import json
 import sqlite3
 from typing import Optional
 
+from ._query import in_clause
+
 
 
 def create_tables(conn: sqlite3.Connection) -> None:
@@ -201,9 +203,10 @@ def retrieve(
 
     cursor = conn.cursor()
 
+    placeholders, params = in_clause(user_ids)
     where_statement = ""
     if user_ids:
-        where_statement = "WHERE id IN (" + ", ".join(["?"] * len(user_ids)) + ")"
+        where_statement = f"WHERE u.id IN ({placeholders})"
 
     sql = f"""
     SELECT u.*,
@@ -236,7 +239,7 @@ def retrieve(
     GROUP BY u.id
     """
     if user_ids:
-        cursor.execute(sql, user_ids)
+        cursor.execute(sql, params)
     else:
         cursor.execute(sql)
 
@@ -13,6 +13,8 @@ import sqlite3
 from typing import Callable, Dict, Literal, Optional, Tuple, Union
 
 from jobcan_di.database import (
+    configure_connection,
+    close_connection,
     forms as f_io,
     group as g_io,
     positions as p_io,
@@ -96,10 +98,19 @@ class JobcanApiGateway:
         データベースとの接続を初期化する
         """
         try:
-            self._conn = sqlite3.connect(db_path)
+            conn = sqlite3.connect(db_path, cached_statements=256)
         except sqlite3.Error as e:
             return ie.DatabaseConnectionFailed(e)
 
+        try:
+            configure_connection(conn)
+        except sqlite3.Error as e:
+            # 設定に失敗した接続は保持しない (is_connected が True にならないように)
+            conn.close()
+            return ie.DatabaseConnectionFailed(e)
+
+        self._conn = conn
+
     def init_tables(self, views:str="") -> Optional[ie.JDIErrorData]:
         """
         データベースのテーブルを初期化する
@@ -134,7 +145,11 @@ class JobcanApiGateway:
         データベースとの接続を切断する
         """
         if isinstance(self._conn, sqlite3.Connection):
-            self._conn.close()
+            try:
+                close_connection(self._conn)
+            except sqlite3.Error:
+                # 統計情報の更新に失敗しても接続は閉じられている
+                pass
 
         self._client.cleanup()
 
@@ -234,6 +249,8 @@ class JobcanApiGateway:
         try:
             update_func(self._conn, data)
         except sqlite3.Error as e:
+            # 途中まで反映されたデータが次のコミットで保存されないように破棄する
+            self._conn.rollback()
             warning = iw.DBUpdateFailed(api_type, e)
             if issue_callback is not None:
                 issue_callback(warning)
@@ -274,6 +291,36 @@ class JobcanApiGateway:
         elif api_type == APIType.FORM_V1:
             return f_io.update
 
+    def _update_many_func(self,
+                          api_type:Literal[APIType.USER_V3, APIType.GROUP_V1, APIType.POSITION_V1,
+                                           APIType.PROJECT_V1, APIType.COMPANY_V1,
+                                           APIType.FIX_JOURNAL_V1, APIType.FORM_V1]
+        ) -> Optional[Callable[[sqlite3.Connection, list[dict]], None]]:
+        """複数件のデータを一括で更新する関数を返す
+
+        Parameters
+        ----------
+        api_type : APIType
+            更新するデータの種類
+
+        Returns
+        -------
+        function or None
+            一括で更新処理を行う関数、引数は (conn, data_list)
+            一括更新に対応していない場合はNone
+        """
+        if api_type == APIType.GROUP_V1:
+            return g_io.update_many
+        elif api_type == APIType.POSITION_V1:
+            return p_io.update_many
+        elif api_type == APIType.PROJECT_V1:
+            return pj_io.update_many
+        elif api_type == APIType.FIX_JOURNAL_V1:
+            return j_io.update_many
+        elif api_type == APIType.FORM_V1:
+            return f_io.update_many
+        return None
+
     def update_basic_data(
             self,
             api_type: Literal[APIType.USER_V3, APIType.GROUP_V1, APIType.POSITION_V1,
@@ -325,6 +372,16 @@ class JobcanApiGateway:
             if issue_callback is not None:
                 issue_callback(data.error)
 
+        # 取得したデータをDBに一括で反映
+        update_many_func = self._update_many_func(api_type)
+        if update_many_func is not None and self._conn is not None:
+            try:
+                update_many_func(self._conn, data.results)
+                return None, r_suc, u_ids
+            except sqlite3.Error:
+                # 失敗したデータを特定するため、1件ずつ反映し直す
+                self._conn.rollback()
+
         # 取得したデータをDBに反映
         for res in data.results:
             err = self._update_data(self._update_func(api_type),
@@ -403,7 +460,7 @@ class JobcanApiGateway:
             return self.not_prepared_error()
 
         # 対象となるform_idを取得 (ignoreで指定されたform_idはこの時点で除外)
-        ids = [id for id in f_io.retrieve_form_ids(self._conn) if str(id) not in ignore]
+        ids = [id for id in f_io.iter_form_ids(self._conn) if str(id) not in ignore]
         if progress_callback:
             progress_callback(APIType.FORM_V1, 0, None, 0, len(ids))
         for f_id in ignore:
@@ -0,0 +1,33 @@
+"""database._queryモジュールのテスト"""
+import sqlite3
+
+import pytest
+
+from jobcan_di.database._query import MAX_PARAMS, in_clause
+
+
+
+@pytest.mark.parametrize("n, expected", [
+    (0, 0), (1, 1), (3, 4), (512, 512),
+    # MAX_PARAMSを超える場合はパディングしない
+    (513, 513), (MAX_PARAMS, MAX_PARAMS),
+])
+def test_in_clause_padding(n, expected):
+    """IN句のプレースホルダ数がパディングされることを確認"""
+    placeholders, params = in_clause(list(range(n)))
+    assert len(params) == expected
+    assert placeholders.count("?") == expected
+    assert params[:n] == list(range(n))
+
+def test_in_clause_query():
+    """パディングされたIN句で正しく検索できることを確認"""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(1000)])
+
+    for n in [3, 600]:
+        placeholders, params = in_clause(list(range(n)))
+        count, = conn.execute(f"SELECT COUNT(*) FROM t WHERE id IN ({placeholders})",
+                              params).fetchone()
+        assert count == n
+    conn.close()
@@ -0,0 +1,35 @@
+"""database.groupモジュールのテスト"""
+import sqlite3
+
+import pytest
+
+from jobcan_di.database import group
+
+
+
+def _group(code, name, parent=None, description=None) -> dict:
+    return {"group_code": code, "group_name": name,
+            "parent_group_code": parent, "description": description}
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    group.create_tables(conn)
+    yield conn
+    conn.close()
+
+
+def test_update_refreshes_existing_code(conn):
+    """同じgroup_codeのグループが更新されることを確認"""
+    group.update(conn, _group("A", "a"))
+    group.update(conn, _group("A", "renamed", "P", "d"))
+
+    assert group.retrieve(conn) == [_group("A", "renamed", "P", "d")]
+
+def test_update_null_code(conn):
+    """group_codeがNULLのグループがgroup_nameで重複排除されることを確認"""
+    for _ in range(3):
+        group.update(conn, _group(None, "n"))
+    group.update_many(conn, [_group(None, "n", "P", "d"), _group(None, "m")])
+
+    assert group.retrieve(conn) == [_group(None, "n", "P", "d"), _group(None, "m")]
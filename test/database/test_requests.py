@@ -0,0 +1,180 @@
+"""database.requestsパッケージのテスト (update後にretrieveで同じデータが得られるか)"""
+import sqlite3
+
+import pytest
+
+from jobcan_di.database import requests
+
+
+
+def _request(request_id:str,
+             customized_items:list=None,
+             approval_process:dict=None) -> dict:
+    """テスト用の申請データ (/v1/requests/{request_id} のレスポンス) を作成する"""
+    return {
+        "id": request_id, "title": "title", "status": "completed",
+        "form_id": 1, "form_name": "form", "form_type": "normal", "settlement_type": "none",
+        "applied_date": "2024/01/01 00:00:00", "applicant_code": "u0",
+        "applicant_last_name": "last", "applicant_first_name": "first",
+        "applicant_group_name": "group", "applicant_group_code": "g0",
+        "applicant_position_name": "position",
+        "proxy_applicant_last_name": None, "proxy_applicant_first_name": None,
+        "group_name": "group", "group_code": "g0", "project_name": None, "project_code": None,
+        "flow_step_name": "step", "is_content_changed": False, "total_amount": 100,
+        "pay_at": None, "final_approval_period": None, "final_approved_date": None,
+        "detail": {
+            "customized_items": customized_items,
+            "expense": None,
+            "payment": None,
+            "ec": None,
+            "approval_process": approval_process,
+            "viewers": None,
+            "modify_logs": None,
+            "default_attachment_files": None
+        }
+    }
+
+def _comment(i:int, text:str="text", deleted:bool=False) -> dict:
+    return {"user_name": f"user{i}", "date": f"2024/01/01 00:00:{i:02}",
+            "text": text, "deleted": deleted}
+
+def _generic_master(name:str, additional_items:list=None) -> dict:
+    return {"record_name": name, "record_code": f"code-{name}",
+            "additional_items": additional_items if additional_items is not None else []}
+
+def _cell(column_number:int, value:str, generic_master:dict=None) -> dict:
+    return {"column_number": column_number, "value": value, "generic_master": generic_master}
+
+def _customized_item(title:str, content:str=None,
+                     generic_master:dict=None, table:list=None) -> dict:
+    return {"title": title, "content": content, "generic_master": generic_master,
+            "files": [], "table": table}
+
+def _approval_process(steps:list, after_completion:dict=None) -> dict:
+    return {
+        "is_route_changed_by_applicant": False,
+        "approval_route_modify_logs": [],
+        "steps": steps,
+        "after_completion": after_completion or {"comments": [], "files": []}
+    }
+
+def _step(name:str, comments:list=None) -> dict:
+    return {"name": name, "condition": "and", "status": "completed",
+            "approvers": [], "comments": comments or [], "files": []}
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(":memory:")
+    requests.create_tables(conn)
+    yield conn.cursor()
+    conn.close()
+
+
+def test_customized_items(cursor):
+    """汎用マスタ付きのテーブルを含む明細が保存時と同じ形で取得できることを確認"""
+    conn = cursor.connection
+    # 汎用マスタが無い場合は、値がNoneで追加項目が空の汎用マスタとして取得される
+    no_gm = {"record_name": None, "record_code": None, "additional_items": []}
+    table = [[_cell(1, "x00", _generic_master("g00", ["a", "b"])), _cell(2, "x01")],
+             [_cell(1, "x10", _generic_master("g10")), _cell(2, "x11")]]
+    file = {"id": "f0", "name": "file.pdf", "type": "pdf"}
+    items = [dict(_customized_item("c0", "v0", _generic_master("c0", ["x"])), files=[file]),
+             _customized_item("c1", table=table),
+             _customized_item("c2")]
+    requests.update(conn, _request("sa-1", customized_items=items))
+    requests.update(conn, _request("sa-2", customized_items=items[1:]))
+
+    expected_table = [[dict(c, generic_master=c["generic_master"] or no_gm) for c in row]
+                      for row in table]
+    assert requests.retrieve_customized_items(cursor, "sa-1") == [
+        dict(items[0], table=[]),
+        dict(items[1], generic_master=no_gm, table=expected_table),
+        dict(items[2], generic_master=no_gm, table=[]),
+    ]
+    # 他の申請のテーブルが混ざらないことを確認
+    assert requests.retrieve_customized_items(cursor, "sa-2")[0]["table"] == expected_table
+    assert requests.retrieve_customized_items(cursor, "none") == []
+
+def test_approval_process(cursor):
+    """承認経路が保存時と同じ形で取得できることを確認"""
+    conn = cursor.connection
+    approvers = [
+        {"status": "approved", "approved_date": "2024/01/02 00:00:00", "approver_name": "a0",
+         "proxy_approver_name": None, "proxy_approver_code": None},
+        {"status": "approved", "approved_date": "2024/01/03 00:00:00", "approver_name": "a1",
+         "proxy_approver_name": "p1", "proxy_approver_code": "pc1"},
+    ]
+    step_file = {"id": "f0", "name": "file.pdf", "type": "pdf",
+                 "user_name": "user0", "date": "2024/01/02 00:00:00", "deleted": False}
+    after_file = {"id": "f1", "name": "after.pdf", "type": "pdf"}
+    ap = {
+        "is_route_changed_by_applicant": True,
+        "approval_route_modify_logs": [{"date": "2024/01/01 00:00:00", "user_name": "m0"},
+                                       {"date": "2024/01/01 00:00:01", "user_name": "m1"}],
+        "steps": [
+            dict(_step("s0", [_comment(0), _comment(1, None)]),
+                 approvers=approvers, files=[step_file]),
+            dict(_step("s1"), approvers=None, comments=None, files=None),
+            _step("s2", [_comment(2, "deleted", True)]),
+        ],
+        "after_completion": {"comments": [_comment(3)], "files": [after_file]}
+    }
+    requests.update(conn, _request("sa-1", approval_process=ap))
+    requests.update(conn, _request("sa-2", approval_process=_approval_process([_step("t0")])))
+
+    # Noneのリストは空のリストとして、ファイルの未設定の項目はNone (deletedはFalse) として取得される
+    assert requests.retrieve_approval_process(cursor, "sa-1") == dict(
+        ap,
+        steps=[ap["steps"][0],
+               _step("s1"),
+               ap["steps"][2]],
+        after_completion={
+            "comments": [_comment(3)],
+            "files": [dict(after_file, user_name=None, date=None, deleted=False)]
+        })
+    assert requests.retrieve_approval_process(cursor, "sa-2") == _approval_process([_step("t0")])
+    assert requests.retrieve_approval_process(cursor, "none") is None
+
+def test_comments_batch(cursor):
+    """一度に検索できる件数を超えるコメントが正しく保存されることを確認"""
+    conn = cursor.connection
+    comments = [_comment(i % 60, f"text{i}") for i in range(700)]
+    # 同じ内容のコメント (user_name, date, text) は1件として保存される
+    requests.update(conn, _request("sa-1", approval_process=_approval_process(
+        [_step("s0", comments[:400]), _step("s1", comments[400:] + comments[:1])])))
+
+    ap = requests.retrieve_approval_process(cursor, "sa-1")
+    assert ap["steps"][0]["comments"] == comments[1:400]
+    assert ap["steps"][1]["comments"] == comments[:1] + comments[400:]
+    assert cursor.execute("SELECT COUNT(*) FROM comments").fetchone()[0] == 700
+
+    # 既存のコメントは削除フラグのみ更新される
+    deleted = [dict(c, deleted=True) for c in comments[:400]]
+    requests.update(conn, _request("sa-1", approval_process=_approval_process(
+        [_step("s0", deleted)])))
+
+    ap = requests.retrieve_approval_process(cursor, "sa-1")
+    assert ap["steps"][0]["comments"] == deleted
+    assert cursor.execute("SELECT COUNT(*) FROM comments").fetchone()[0] == 700
+
+def test_generic_masters_batch(cursor):
+    """一度に検索できる件数を超える汎用マスタが正しく保存されることを確認"""
+    conn = cursor.connection
+    table = [[_cell(j, f"{i}-{j}", _generic_master(f"{i}-{j}", [f"a{i}", f"b{j}"]))
+              for j in range(20)] for i in range(30)]
+    items = [_customized_item("c0", "v0", _generic_master("c0", ["x"])),
+             _customized_item("c1", table=table)]
+    requests.update(conn, _request("sa-1", customized_items=items))
+
+    retrieved = requests.retrieve_customized_items(cursor, "sa-1")
+    assert retrieved[0]["generic_master"] == items[0]["generic_master"]
+    assert retrieved[1]["table"] == table
+    assert cursor.execute("SELECT COUNT(*) FROM generic_masters").fetchone()[0] == 601
+
+    # 2回目の更新では既存の汎用マスタが更新される
+    # (追加項目が減った場合の削除は未対応のため、同じ件数で更新する)
+    table[0][0]["generic_master"] = _generic_master("renamed", ["y", "z"])
+    requests.update(conn, _request("sa-1", customized_items=items))
+
+    assert requests.retrieve_customized_items(cursor, "sa-1")[1]["table"] == table
+    assert cursor.execute("SELECT COUNT(*) FROM generic_masters").fetchone()[0] == 601